@@ -0,0 +1,299 @@
+from font import FONT_8x8
+
+# 保留模式显示列表
+#
+# 界面由若干命名节点（矩形、直线、圆、文字、位图）组成，节点按添加顺序叠放。
+# 修改节点后只重绘它新旧位置覆盖的区域：在该区域内设置裁剪，先用背景色清除，
+# 再按顺序重绘所有与区域相交的节点，最后只刷新这些区域到屏幕。
+
+_LCD_WIDTH = 300   # 与 ST7306.LCD_WIDTH 一致
+_LCD_HEIGHT = 400  # 与 ST7306.LCD_HEIGHT 一致
+
+
+def _union(a, b):
+    """合并两个矩形 (x, y, w, h)，返回包含两者的最小矩形"""
+    x0 = min(a[0], b[0])
+    y0 = min(a[1], b[1])
+    x1 = max(a[0] + a[2], b[0] + b[2])
+    y1 = max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def _intersects(a, b):
+    """判断两个矩形 (x, y, w, h) 是否相交"""
+    return (a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and
+            a[1] < b[1] + b[3] and b[1] < a[1] + a[3])
+
+
+class Node:
+    """显示列表节点基类
+
+    子类通过 PROPS 声明属性名，需要实现 bbox() 和 draw(lcd)；
+    绘制内容不占满 bbox 的节点可以重写 overlaps(rect)
+    """
+    PROPS = ()
+
+    def __init__(self, **props):
+        for name in self.PROPS:
+            setattr(self, name, None)
+        self.color = 1
+        self.set(**props)
+
+    def set(self, **props):
+        """修改节点属性，未声明的属性名会抛出 AttributeError"""
+        for name, value in props.items():
+            if name != 'color' and name not in self.PROPS:
+                raise AttributeError("{} has no property '{}'".format(
+                    type(self).__name__, name))
+            setattr(self, name, value)
+
+    def bbox(self):
+        """返回节点覆盖的矩形区域 (x, y, w, h)"""
+        raise NotImplementedError
+
+    def draw(self, lcd):
+        """将节点绘制到显示缓冲区"""
+        raise NotImplementedError
+
+    def overlaps(self, rect):
+        """判断节点绘制的像素是否可能落在矩形 (x, y, w, h) 内"""
+        return _intersects(rect, self.bbox())
+
+
+class Rect(Node):
+    """矩形节点
+
+    属性：x, y, width, height, color, fill（True 时填充矩形）
+    """
+    PROPS = ('x', 'y', 'width', 'height', 'fill')
+
+    def bbox(self):
+        if self.fill:
+            return (self.x, self.y, self.width, self.height)
+        # 与 ST7306.draw_rect 的坐标限制规则保持一致
+        x = max(0, min(self.x, _LCD_WIDTH - 1))
+        y = max(0, min(self.y, _LCD_HEIGHT - 1))
+        return (x, y, min(self.width, _LCD_WIDTH - x), min(self.height, _LCD_HEIGHT - y))
+
+    def draw(self, lcd):
+        if self.fill:
+            lcd.fill_rect(self.x, self.y, self.width, self.height,
+                          0x03 if self.color else 0x00)
+        else:
+            lcd.draw_rect(self.x, self.y, self.width, self.height, self.color)
+
+    def overlaps(self, rect):
+        if self.fill:
+            return _intersects(rect, self.bbox())
+        # 空心矩形只绘制四条边，区域完全落在内部时不需要重绘
+        x, y, w, h = self.bbox()
+        return (_intersects(rect, (x, y, w, 1)) or
+                _intersects(rect, (x, y + h - 1, w, 1)) or
+                _intersects(rect, (x, y, 1, h)) or
+                _intersects(rect, (x + w - 1, y, 1, h)))
+
+
+class Line(Node):
+    """直线节点
+
+    属性：x1, y1, x2, y2, color
+    """
+    PROPS = ('x1', 'y1', 'x2', 'y2')
+
+    def bbox(self):
+        # 与 ST7306.draw_line 一样先把端点限制在屏幕范围内
+        x1 = max(0, min(self.x1, _LCD_WIDTH - 1))
+        y1 = max(0, min(self.y1, _LCD_HEIGHT - 1))
+        x2 = max(0, min(self.x2, _LCD_WIDTH - 1))
+        y2 = max(0, min(self.y2, _LCD_HEIGHT - 1))
+        return (min(x1, x2), min(y1, y2), abs(x2 - x1) + 1, abs(y2 - y1) + 1)
+
+    def draw(self, lcd):
+        lcd.draw_line(self.x1, self.y1, self.x2, self.y2, self.color)
+
+
+class Circle(Node):
+    """圆形节点
+
+    属性：x0, y0, radius, color
+    """
+    PROPS = ('x0', 'y0', 'radius')
+
+    def bbox(self):
+        r = self.radius
+        return (self.x0 - r, self.y0 - r, 2 * r + 1, 2 * r + 1)
+
+    def draw(self, lcd):
+        lcd.draw_circle(self.x0, self.y0, self.radius, self.color)
+
+
+class Text(Node):
+    """文字节点
+
+    属性：x, y, text, scale（默认为1）, color
+    """
+    PROPS = ('x', 'y', 'text', 'scale')
+
+    def bbox(self):
+        # 与 ST7306.draw_string 的换行规则保持一致
+        scale = self.scale or 1
+        char_width = 8 * scale
+        char_height = 8 * scale
+        x, y = self.x, self.y
+        x0, y0, x1, y1 = x, y, x, y
+        for char in self.text or '':
+            if char not in FONT_8x8:
+                continue
+            if x + char_width > _LCD_WIDTH:
+                x = 0
+                y += char_height
+                if y + char_height > _LCD_HEIGHT:
+                    break
+            x0 = min(x0, x)
+            x1 = max(x1, x + char_width)
+            y1 = max(y1, y + char_height)
+            x += char_width
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def draw(self, lcd):
+        lcd.draw_string(self.x, self.y, self.text, self.scale or 1, self.color)
+
+
+class Bitmap(Node):
+    """单色位图节点
+
+    属性：x, y, width, height, data, color
+    data 按行存储，每行 (width + 7) // 8 个字节，高位在左；
+    置位的像素以 color 绘制，未置位的像素保持不变
+    """
+    PROPS = ('x', 'y', 'width', 'height', 'data')
+
+    def bbox(self):
+        return (self.x, self.y, self.width, self.height)
+
+    def draw(self, lcd):
+        value = 0x03 if self.color else 0x00
+        data = self.data
+        stride = (self.width + 7) // 8
+        for row in range(self.height):
+            base = row * stride
+            for col in range(self.width):
+                if data[base + (col >> 3)] & (0x80 >> (col & 7)):
+                    lcd.pixel(self.x + col, self.y + row, value)
+
+
+class DisplayList:
+    """保留模式显示列表
+
+    参数说明：
+    lcd: ST7306 对象
+    background: 背景颜色（0-3），默认为0（白色）
+
+    使用示例：
+    dl = DisplayList(lcd)
+    dl.add('frame', Rect(x=0, y=0, width=300, height=400))
+    dl.add('value', Text(x=20, y=40, text='0', scale=3))
+    dl.render()                     # 首次渲染整屏
+    dl.update('value', text='42')   # 只标记数值所在区域
+    dl.render()                     # 只重绘并刷新该区域
+    """
+    def __init__(self, lcd, background=0):
+        self.lcd = lcd
+        self.background = background & 0x03
+        self._nodes = {}
+        self._order = []
+        self._dirty = []
+        self._full = True
+
+    def add(self, name, node):
+        """添加节点（叠放在已有节点之上），同名节点会被替换"""
+        if name in self._nodes:
+            self.remove(name)
+        self._nodes[name] = node
+        self._order.append(name)
+        self._mark(node.bbox())
+        return node
+
+    def remove(self, name):
+        """移除节点，其覆盖区域会在下次渲染时重绘"""
+        node = self._nodes.pop(name)
+        self._order.remove(name)
+        self._mark(node.bbox())
+
+    def get(self, name):
+        """按名称获取节点"""
+        return self._nodes[name]
+
+    def update(self, name, **props):
+        """修改节点属性并标记需要重绘的区域
+
+        使用示例：
+        dl.update('value', text='43')
+        """
+        node = self._nodes[name]
+        old = node.bbox()
+        node.set(**props)
+        new = node.bbox()
+        if _intersects(old, new):
+            self._mark(_union(old, new))
+        else:
+            self._mark(old)
+            self._mark(new)
+
+    def invalidate(self):
+        """标记整屏需要重绘"""
+        self._full = True
+
+    def _mark(self, rect):
+        """记录脏区域（裁剪到屏幕范围内）"""
+        x0 = max(0, rect[0])
+        y0 = max(0, rect[1])
+        x1 = min(self.lcd.LCD_WIDTH, rect[0] + rect[2])
+        y1 = min(self.lcd.LCD_HEIGHT, rect[1] + rect[3])
+        if x0 < x1 and y0 < y1:
+            self._dirty.append((x0, y0, x1 - x0, y1 - y0))
+
+    def _regions(self):
+        """合并相交的脏区域，避免同一块区域重绘多次"""
+        regions = []
+        for rect in self._dirty:
+            i = 0
+            while i < len(regions):
+                if _intersects(regions[i], rect):
+                    rect = _union(regions.pop(i), rect)
+                    i = 0
+                else:
+                    i += 1
+            regions.append(rect)
+        return regions
+
+    def render(self):
+        """重绘脏区域并刷新到屏幕
+
+        每个区域先设置裁剪，再清为背景色并按叠放顺序重绘与之重叠的节点，
+        区域外的像素不会被修改。返回本次重绘的区域列表，整屏重绘时返回 None
+        """
+        lcd = self.lcd
+        if self._full:
+            self._full = False
+            self._dirty = []
+            lcd.set_clip()
+            lcd.fill_rect(0, 0, lcd.LCD_WIDTH, lcd.LCD_HEIGHT, self.background)
+            for name in self._order:
+                self._nodes[name].draw(lcd)
+            lcd.show()
+            return None
+
+        regions = self._regions()
+        self._dirty = []
+        for rect in regions:
+            lcd.set_clip(rect[0], rect[1], rect[2], rect[3])
+            lcd.fill_rect(rect[0], rect[1], rect[2], rect[3], self.background)
+            for name in self._order:
+                node = self._nodes[name]
+                if node.overlaps(rect):
+                    node.draw(lcd)
+        lcd.set_clip()
+        for rect in regions:
+            lcd.show_rect(rect[0], rect[1], rect[2], rect[3])
+        return regions
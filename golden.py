@@ -0,0 +1,438 @@
+import sys
+import time
+import math
+
+from snapshot import HostPin, CaptureSPI, decode, save_png, load_png, install_host_modules
+
+# 黄金图像回归测试
+#
+# 在主机上（MicroPython unix 版或 CPython）运行 main.py 中的测试画面和一组压力画面，
+# 将渲染结果与 golden/ 目录中的参考图像逐像素比对，并记录每个画面的渲染耗时。
+# 同时检查通过 SPI 发送到控制器的画面与显示缓冲区一致。
+#
+# 使用方法：
+# python3 golden.py              # 比对所有画面
+# python3 golden.py basic_shapes # 只比对指定画面
+# python3 golden.py --update     # 重新生成参考图像
+# micropython golden.py          # 在 unix 版上运行，可同时比对 viper 内核
+#
+# 不一致的画面会把实际结果写入 golden_out/ 目录
+
+
+install_host_modules()
+
+import st7306
+from display_list import DisplayList, Rect, Line, Circle, Text, Bitmap
+from text_layout import LEFT, CENTER, RIGHT, draw_text, layout, TextField
+
+GOLDEN_DIR = 'golden'
+OUTPUT_DIR = 'golden_out'
+
+
+def _ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1000000)
+
+
+def _ticks_diff(end, start):
+    if hasattr(time, 'ticks_diff'):
+        return time.ticks_diff(end, start)
+    return end - start
+
+
+class _Random:
+    """固定种子的线性同余随机数，保证不同平台上生成相同的画面"""
+    def __init__(self, seed):
+        self.state = seed
+
+    def randrange(self, start, stop=None):
+        if stop is None:
+            start, stop = 0, start
+        self.state = (self.state * 1103515245 + 12345) & 0x7FFFFFFF
+        return start + (self.state >> 8) % (stop - start)
+
+
+# ---------------------------------------------------------------------------
+# main.py 中的测试画面（保留每个测试最后一帧）
+# ---------------------------------------------------------------------------
+
+def scene_basic_shapes(lcd):
+    lcd.clear()
+    lcd.draw_line(0, 0, 299, 399, 1)
+    lcd.draw_rect(50, 50, 200, 300, 1)
+    lcd.draw_circle(150, 200, 50, 1)
+    lcd.draw_string(10, 10, "Basic Shapes Test", 2)
+    lcd.show()
+
+
+def scene_rotating_line(lcd):
+    center_x, center_y = 150, 200
+    radius = 100
+    for angle in range(0, 360, 5):
+        lcd.clear()
+        rad = math.radians(angle)
+        end_x = int(center_x + radius * math.cos(rad))
+        end_y = int(center_y + radius * math.sin(rad))
+        lcd.draw_line(center_x, center_y, end_x, end_y, 1)
+        lcd.show()
+
+
+def scene_expanding_circles(lcd):
+    for radius in range(10, 100, 5):
+        lcd.clear()
+        lcd.draw_circle(150, 200, radius, 1)
+        lcd.show()
+
+
+def scene_moving_text(lcd):
+    for pos in range(0, 400, 10):
+        lcd.clear()
+        lcd.draw_string(10, pos, "Moving Text Test", 2)
+        lcd.show()
+
+
+def scene_bouncing_ball(lcd):
+    x, y = 150, 50
+    dx, dy = 5, 5
+    radius = 10
+    for _ in range(100):
+        lcd.clear()
+        x += dx
+        y += dy
+        if x - radius <= 0 or x + radius >= 299:
+            dx = -dx
+        if y - radius <= 0 or y + radius >= 399:
+            dy = -dy
+        lcd.draw_circle(int(x), int(y), radius, 1)
+        lcd.show()
+
+
+def scene_rectangle_pattern(lcd):
+    lcd.clear()
+    for i in range(0, 150, 20):
+        lcd.draw_rect(i, i, 300 - 2 * i, 400 - 2 * i, 1)
+    lcd.show()
+
+
+def scene_diagonal_pattern(lcd):
+    lcd.clear()
+    for i in range(0, 300, 20):
+        lcd.draw_line(0, 0, i, 399, 1)
+        lcd.draw_line(299, 0, i, 399, 1)
+    lcd.show()
+
+
+def scene_circle_pattern(lcd):
+    lcd.clear()
+    for i in range(10, 150, 20):
+        lcd.draw_circle(150, 200, i, 1)
+    lcd.show()
+
+
+def scene_test_complete(lcd):
+    lcd.clear()
+    lcd.draw_string(10, 150, "Test Complete", 2)
+    lcd.draw_string(10, 200, "Press Reset", 2)
+    lcd.show()
+
+
+# ---------------------------------------------------------------------------
+# 压力画面
+# ---------------------------------------------------------------------------
+
+def scene_stress_lines(lcd):
+    rnd = _Random(1)
+    lcd.clear()
+    for _ in range(300):
+        lcd.draw_line(rnd.randrange(-20, 320), rnd.randrange(-20, 420),
+                      rnd.randrange(-20, 320), rnd.randrange(-20, 420),
+                      rnd.randrange(2))
+    lcd.show()
+
+
+def scene_stress_circles(lcd):
+    rnd = _Random(2)
+    lcd.clear()
+    for _ in range(150):
+        lcd.draw_circle(rnd.randrange(300), rnd.randrange(400),
+                        rnd.randrange(1, 120), 1)
+    lcd.show()
+
+
+def scene_stress_text(lcd):
+    chars = sorted(st7306.FONT_8x8)
+    text = ''.join(chars)
+    lcd.clear()
+    for row in range(0, 400, 8):
+        lcd.draw_string(0, row, text[row % len(text):] + text)
+    lcd.draw_string(-4, 100, "Scaled 3x", 3)
+    lcd.draw_string(200, 300, "Wrap at edge", 2)
+    lcd.show()
+
+
+def scene_stress_pixels(lcd):
+    rnd = _Random(3)
+    lcd.clear()
+    for _ in range(20000):
+        lcd.pixel(rnd.randrange(300), rnd.randrange(400), rnd.randrange(4))
+    lcd.show()
+
+
+def scene_stress_fill_rect(lcd):
+    rnd = _Random(4)
+    lcd.clear()
+    for _ in range(200):
+        lcd.fill_rect(rnd.randrange(-20, 300), rnd.randrange(-20, 400),
+                      rnd.randrange(1, 80), rnd.randrange(1, 80), rnd.randrange(4))
+    lcd.show()
+
+
+def scene_stress_clip(lcd):
+    rnd = _Random(5)
+    lcd.clear()
+    for _ in range(40):
+        x, y = rnd.randrange(300), rnd.randrange(400)
+        lcd.set_clip(x, y, rnd.randrange(1, 120), rnd.randrange(1, 120))
+        lcd.fill_rect(0, 0, 300, 400, rnd.randrange(4))
+        lcd.draw_line(0, rnd.randrange(400), 299, rnd.randrange(400), 0)
+        lcd.draw_circle(x, y, rnd.randrange(1, 60), 1)
+        lcd.draw_string(x - 8, y + 4, "CLIP", 2, 0)
+        lcd.draw_rect(rnd.randrange(-40, 300), rnd.randrange(-40, 400),
+                      rnd.randrange(-2, 200), rnd.randrange(-2, 200), 1)
+        lcd.draw_rect(0, 0, 300, 400, rnd.randrange(2))
+    lcd.set_clip()
+    lcd.show()
+
+
+def scene_display_list(lcd):
+    rnd = _Random(6)
+    dl = DisplayList(lcd)
+    dl.add('frame', Rect(x=0, y=0, width=300, height=400))
+    dl.add('diagonal', Line(x1=0, y1=0, x2=299, y2=399))
+    dl.add('gauge', Circle(x0=150, y0=260, radius=80))
+    dl.add('panel', Rect(x=20, y=20, width=260, height=60, fill=True))
+    dl.add('title', Text(x=30, y=36, text='Dashboard', scale=2, color=0))
+    dl.add('icon', Bitmap(x=250, y=100, width=16, height=16,
+                          data=bytes([0xFF, 0xFF] + [0x80, 0x01] * 14 + [0xFF, 0xFF])))
+    dl.add('value', Text(x=40, y=120, text='0', scale=3))
+    dl.add('needle', Line(x1=150, y1=260, x2=150, y2=180))
+    dl.render()
+    # 之后的更新都在外框内部，记录外框（唯一的空心矩形）被重绘的次数
+    frame_draws = []
+    draw_rect = lcd.draw_rect
+
+    def counting_draw_rect(*args):
+        frame_draws.append(args)
+        draw_rect(*args)
+
+    lcd.draw_rect = counting_draw_rect
+    for tick in range(50):
+        dl.update('value', text=str(rnd.randrange(100000)))
+        angle = math.radians(tick * 7)
+        dl.update('needle', x2=150 + int(70 * math.sin(angle)),
+                  y2=260 - int(70 * math.cos(angle)))
+        if tick % 10 == 0:
+            dl.update('icon', y=100 + tick)
+        dl.render()
+
+    def verify():
+        # 内部区域的更新不应再遍历外框的四条边
+        assert not frame_draws, 'frame redrawn {} times by interior updates'.format(len(frame_draws))
+        # 首次整屏渲染之后只有 show_rect 的局部刷新，屏幕内容必须与缓冲区一致
+        assert bytes(lcd.spi.frame) == bytes(lcd.buffer), 'partial flushes differ from buffer'
+        # 增量渲染的结果必须与整屏重绘完全相同
+        incremental = bytes(lcd.buffer)
+        dl.invalidate()
+        dl.render()
+        assert bytes(lcd.buffer) == incremental, 'incremental render differs from full repaint'
+
+    return verify
+
+
+def scene_text_layout(lcd):
+    text = "The quick brown fox jumps over the lazy dog. Pack my box with five dozen liquor jugs."
+    lcd.clear()
+    lcd.draw_rect(9, 9, 282, 122, 1)
+    draw_text(lcd, 10, 10, text, 280, 120, 1, LEFT)
+    lcd.draw_rect(9, 139, 282, 122, 1)
+    draw_text(lcd, 10, 140, text, 280, 120, 2, CENTER)
+    lcd.draw_rect(9, 269, 282, 122, 1)
+    draw_text(lcd, 10, 270, "Right\naligned\nSupercalifragilistic", 280, 120, 2, RIGHT)
+    lcd.show()
+
+
+def scene_text_field(lcd):
+    rnd = _Random(7)
+    lcd.clear()
+    fields = [
+        TextField(lcd, 10, 10, 280, scale=3, align=RIGHT),
+        TextField(lcd, 10, 60, 280, scale=2, align=CENTER),
+        TextField(lcd, 10, 100, 120, 64, scale=1, align=LEFT),
+    ]
+    value = 12345
+    for tick in range(60):
+        value += rnd.randrange(-50, 50)
+        fields[0].set_text('{}.{}V'.format(value // 100, value % 100))
+        fields[1].set_text('T {}'.format(tick * rnd.randrange(1, 30)))
+        fields[2].set_text('Status {} ok {}'.format(tick % 7, 'warn' if tick % 5 else ''))
+    lcd.show()
+
+
+def scene_text_field_padded(lcd):
+    lcd.clear()
+    size = 16
+    volts = TextField(lcd, 10, 10, 160, scale=2, align=LEFT)
+    amps = TextField(lcd, 10, 40, 160, scale=2, align=LEFT)
+    values = [9.5, 9.6, 9.7, 10.7, 10.8, 99.9, 100.0, 7.2, 7.3]
+    single_digit = []
+    previous = None
+    for value in values:
+        text = '{:>6.1f}V'.format(value)
+        rect = volts.set_text(text)
+        if previous is not None and len(previous) == len(text):
+            changed = [i for i in range(len(text)) if text[i] != previous[i]]
+            if len(changed) == 1:
+                single_digit.append((changed[0], rect))
+        previous = text
+    for tick in range(30):
+        amps.set_text('{:>5}mA'.format(tick * 37 % 1000))
+    lcd.show()
+
+    def verify():
+        # 补齐用的前导空格必须保留：'   9.5' 中的 '9' 位于第4格
+        cells = layout('{:>6.1f}'.format(9.5), 160, scale=2, align=LEFT)
+        assert cells.get((3 * size, 0)) == '9', 'leading spaces dropped: {}'.format(cells)
+        # 只有一个字符变化时只重绘这一个格子
+        assert single_digit, 'no single-character updates recorded'
+        for index, rect in single_digit:
+            expected = (10 + index * size, 10, size, size)
+            assert rect == expected, 'redrew {} instead of {}'.format(rect, expected)
+
+    return verify
+
+
+SCENES = [
+    ('basic_shapes', scene_basic_shapes),
+    ('rotating_line', scene_rotating_line),
+    ('expanding_circles', scene_expanding_circles),
+    ('moving_text', scene_moving_text),
+    ('bouncing_ball', scene_bouncing_ball),
+    ('rectangle_pattern', scene_rectangle_pattern),
+    ('diagonal_pattern', scene_diagonal_pattern),
+    ('circle_pattern', scene_circle_pattern),
+    ('test_complete', scene_test_complete),
+    ('stress_lines', scene_stress_lines),
+    ('stress_circles', scene_stress_circles),
+    ('stress_text', scene_stress_text),
+    ('stress_pixels', scene_stress_pixels),
+    ('stress_fill_rect', scene_stress_fill_rect),
+    ('stress_clip', scene_stress_clip),
+    ('display_list', scene_display_list),
+    ('text_layout', scene_text_layout),
+    ('text_field', scene_text_field),
+    ('text_field_padded', scene_text_field_padded),
+]
+
+
+def _kernel_sets():
+    """返回可用的绘图内核：纯 Python 版本总是可用，固件支持时还有 viper 版本"""
+    sets = [('python', (st7306._pixel_py, st7306._fill_py, st7306._line_py, st7306._glyph_py))]
+    if st7306._viper is not None:
+        v = st7306._viper
+        sets.append(('viper', (v.pixel, v.fill, v.line, v.glyph)))
+    return sets
+
+
+def _use_kernels(kernels):
+    st7306._pixel, st7306._fill, st7306._line, st7306._glyph = kernels
+
+
+def _path(directory, name):
+    return '{}/{}.png'.format(directory, name)
+
+
+def _makedirs(path):
+    try:
+        import os
+        os.mkdir(path)
+    except OSError:
+        pass
+
+
+def run_scene(name, scene):
+    """在新的显示对象上渲染画面，返回 (lcd, spi, 耗时微秒, 检查函数)
+
+    画面可以返回一个检查函数，在计时结束后调用，不满足时抛出 AssertionError
+    """
+    dc = HostPin()
+    spi = CaptureSPI(dc)
+    lcd = st7306.ST7306(spi, HostPin(), dc, HostPin())
+    spi.bytes_written = 0
+    start = _ticks_us()
+    verify = scene(lcd)
+    elapsed = _ticks_diff(_ticks_us(), start)
+    return lcd, spi, elapsed, verify
+
+
+def _run_verify(verify):
+    """调用画面返回的检查函数，返回失败信息，通过时返回 None"""
+    if verify is None:
+        return None
+    try:
+        verify()
+    except AssertionError as e:
+        return str(e)
+    return None
+
+
+def main(argv):
+    update = '--update' in argv
+    names = [arg for arg in argv if not arg.startswith('--')]
+    scenes = [(n, s) for n, s in SCENES if not names or n in names]
+    if update:
+        _makedirs(GOLDEN_DIR)
+
+    failures = 0
+    print('{:<20} {:<7} {:>10} {:>10}  {}'.format('scene', 'kernel', 'time(ms)', 'spi bytes', 'result'))
+    try:
+        for kernel_name, kernels in _kernel_sets():
+            _use_kernels(kernels)
+            for name, scene in scenes:
+                lcd, spi, elapsed, verify = run_scene(name, scene)
+                bytes_written = spi.bytes_written
+                result = 'ok'
+                error = _run_verify(verify)
+                if error is not None:
+                    result = 'FAIL ({})'.format(error)
+                elif bytes(spi.frame) != bytes(lcd.buffer):
+                    result = 'FAIL (panel frame differs from buffer)'
+                elif update and kernel_name == 'python':
+                    save_png(_path(GOLDEN_DIR, name), lcd.buffer)
+                    result = 'updated'
+                else:
+                    try:
+                        width, height, expected = load_png(_path(GOLDEN_DIR, name))
+                    except OSError:
+                        expected = None
+                    actual = decode(lcd.buffer)
+                    if expected is None:
+                        result = 'FAIL (missing reference)'
+                    elif expected != actual:
+                        diff = sum(1 for a, b in zip(expected, actual) if a != b)
+                        result = 'FAIL ({} pixels differ)'.format(diff)
+                if result.startswith('FAIL'):
+                    failures += 1
+                    _makedirs(OUTPUT_DIR)
+                    save_png(_path(OUTPUT_DIR, '{}.{}'.format(name, kernel_name)), lcd.buffer)
+                print('{:<20} {:<7} {:>10.1f} {:>10}  {}'.format(
+                    name, kernel_name, elapsed / 1000, bytes_written, result))
+    finally:
+        _use_kernels(dict(_kernel_sets())[st7306.KERNEL])
+
+    print('{} failure(s)'.format(failures))
+    return failures
+
+
+if __name__ == '__main__':
+    sys.exit(1 if main(sys.argv[1:]) else 0)
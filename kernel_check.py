@@ -0,0 +1,148 @@
+import sys
+from array import array
+
+from snapshot import install_host_modules
+
+# viper 内核与纯 Python 内核的等价性检查
+#
+# 对每一对内核（pixel / fill / line / glyph）使用相同的随机输入，分别写入两份
+# 内容相同的缓冲区，逐字节比较结果。固件不支持 viper 时跳过。
+#
+# 使用方法：
+# micropython kernel_check.py   # 主机上的 MicroPython unix 版
+# import kernel_check; kernel_check.main()   # 开发板上
+
+install_host_modules()
+
+import st7306
+from font import FONT_8x8
+
+WIDTH = 300
+HEIGHT = 400
+BUFFER_SIZE = 150 * 200
+
+
+class _Random:
+    """固定种子的线性同余随机数，保证每次运行的输入相同"""
+    def __init__(self, seed):
+        self.state = seed
+
+    def randrange(self, start, stop=None):
+        if stop is None:
+            start, stop = 0, start
+        self.state = (self.state * 1103515245 + 12345) & 0x7FFFFFFF
+        return start + (self.state >> 8) % (stop - start)
+
+    def choice(self, items):
+        return items[self.randrange(len(items))]
+
+
+def _clamp(value, limit):
+    # 与 ST7306.draw_line 对端点的限制一致
+    return max(0, min(value, limit - 1))
+
+
+def _clip(rnd):
+    """随机返回整屏或一个随机裁剪区域 [x0, y0, x1, y1]"""
+    if rnd.randrange(2):
+        return [0, 0, WIDTH, HEIGHT]
+    x0 = rnd.randrange(WIDTH)
+    y0 = rnd.randrange(HEIGHT)
+    return [x0, y0, rnd.randrange(x0, WIDTH + 1), rnd.randrange(y0, HEIGHT + 1)]
+
+
+def _line_cases(rnd, count):
+    """直线参数：水平、垂直、单点、陡峭、反向、超出屏幕后被限制的端点，以及随机直线"""
+    cases = [
+        (0, 0, 299, 0), (299, 399, 0, 399),        # 水平，正向/反向
+        (5, 0, 5, 399), (7, 399, 7, 0),            # 垂直，正向/反向
+        (150, 200, 150, 200),                      # 单点
+        (10, 10, 20, 300), (20, 300, 10, 10),      # 陡峭，正向/反向
+        (290, 5, 3, 390), (3, 390, 290, 5),        # 陡峭，斜率为负
+        (0, 399, 299, 0), (299, 0, 0, 399),        # 对角线
+        (-50, -50, 400, 500), (350, -20, -30, 450),  # 端点超出屏幕
+        (-100, 200, -10, 210), (310, 0, 500, 399),   # 整条在屏幕外，限制后落在边缘
+    ]
+    for _ in range(count):
+        cases.append((rnd.randrange(-60, WIDTH + 60), rnd.randrange(-60, HEIGHT + 60),
+                      rnd.randrange(-60, WIDTH + 60), rnd.randrange(-60, HEIGHT + 60)))
+    return cases
+
+
+def check(iterations=500, seed=1):
+    """运行等价性检查，返回失败的用例数；viper 不可用时返回 None"""
+    viper = st7306._viper
+    if viper is None:
+        print('viper kernels not available, skipped')
+        return None
+
+    rnd = _Random(seed)
+    buf_py = bytearray(BUFFER_SIZE)
+    for i in range(BUFFER_SIZE):
+        buf_py[i] = rnd.randrange(256)
+    buf_viper = bytearray(buf_py)
+
+    failures = 0
+    counts = {}
+
+    def compare(kernel, case):
+        nonlocal failures
+        counts[kernel] = counts.get(kernel, 0) + 1
+        if buf_py != buf_viper:
+            failures += 1
+            print('FAIL {} {}'.format(kernel, case))
+            buf_viper[:] = buf_py
+
+    # pixel：随机坐标和颜色，写入已有随机内容的缓冲区以覆盖置位和清零
+    for _ in range(iterations * 4):
+        x, y, color = rnd.randrange(WIDTH), rnd.randrange(HEIGHT), rnd.randrange(4)
+        st7306._pixel_py(buf_py, x, y, color)
+        viper.pixel(buf_viper, x, y, color)
+        compare('pixel', (x, y, color))
+
+    # fill：随机长度和起始偏移
+    for _ in range(iterations // 10 + 1):
+        offset = rnd.randrange(BUFFER_SIZE)
+        size = rnd.randrange(BUFFER_SIZE - offset + 1)
+        value = rnd.randrange(256)
+        st7306._fill_py(memoryview(buf_py)[offset:], size, value)
+        viper.fill(memoryview(buf_viper)[offset:], size, value)
+        compare('fill', (offset, size, value))
+
+    # line：与 draw_line 一样先限制端点，再配合整屏或随机裁剪区域
+    for x1, y1, x2, y2 in _line_cases(rnd, iterations):
+        clip = _clip(rnd)
+        args = array('h', [_clamp(x1, WIDTH), _clamp(y1, HEIGHT),
+                           _clamp(x2, WIDTH), _clamp(y2, HEIGHT)] + clip)
+        value = rnd.choice((0, 3))
+        st7306._line_py(buf_py, args, value)
+        viper.line(buf_viper, args, value)
+        compare('line', (x1, y1, x2, y2, clip, value))
+
+    # glyph：包含负的起始坐标、靠近右/下边缘的位置和 scale > 1
+    chars = sorted(FONT_8x8)
+    for _ in range(iterations):
+        scale = rnd.randrange(1, 5)
+        size = 8 * scale
+        x = rnd.randrange(-size - 4, WIDTH + 4)
+        y = rnd.randrange(-size - 4, HEIGHT + 4)
+        if rnd.randrange(4) == 0:
+            x, y = -rnd.randrange(1, size), -rnd.randrange(1, size)
+        char = rnd.choice(chars)
+        args = array('h', [x, y, scale, rnd.choice((0, 3))] + _clip(rnd))
+        st7306._glyph_py(buf_py, st7306._GLYPHS[char], args)
+        viper.glyph(buf_viper, st7306._GLYPHS[char], args)
+        compare('glyph', (char, list(args)))
+
+    for kernel in ('pixel', 'fill', 'line', 'glyph'):
+        print('{:<6} {:>5} cases'.format(kernel, counts.get(kernel, 0)))
+    print('{} failure(s)'.format(failures))
+    return failures
+
+
+def main():
+    return check()
+
+
+if __name__ == '__main__':
+    sys.exit(1 if main() else 0)
@@ -0,0 +1,319 @@
+import sys
+import time
+import struct
+
+try:
+    import zlib
+except ImportError:
+    zlib = None
+
+# 显示缓冲区快照导出
+#
+# 将 ST7306 的 2x2 交错布局缓冲区（或抓取到的 SPI 帧）解码为逐像素灰度，
+# 导出为 PGM / PNG，便于在主机上查看和比对。
+#
+# 缓冲区布局与 ST7306 保持一致：
+# P0P2 P4P6      BIT7 BIT5 BIT3 BIT1
+# P1P3 P5P7  ->  BIT6 BIT4 BIT2 BIT0
+
+WIDTH = 300        # 与 ST7306.LCD_WIDTH 一致
+HEIGHT = 400       # 与 ST7306.LCD_HEIGHT 一致
+DATA_WIDTH = 150   # 与 ST7306.LCD_DATA_WIDTH 一致
+
+# 像素值（0-3）到灰度的映射：0 为白色，3 为黑色
+GRAY = (255, 170, 85, 0)
+
+
+def decode(buf, width=WIDTH, height=HEIGHT):
+    """将显示缓冲区解码为逐像素的值（0-3）
+
+    参数说明：
+    buf: 显示缓冲区（lcd.buffer 或抓取到的帧数据）
+    width, height: 图像尺寸
+
+    返回 bytearray，按行存储，长度为 width * height
+
+    使用示例：
+    pixels = decode(lcd.buffer)
+    value = pixels[y * 300 + x]
+    """
+    data_width = width // 2
+    pixels = bytearray(width * height)
+    for y in range(height):
+        row = (y // 2) * data_width
+        one_two = y % 2
+        base = y * width
+        for x in range(width):
+            data = buf[row + x // 2]
+            bit1 = 7 - ((x % 2) * 4 + one_two)
+            pixels[base + x] = (((data >> bit1) & 0x01) << 1) | ((data >> (bit1 - 2)) & 0x01)
+    return pixels
+
+
+def to_gray(pixels):
+    """将像素值（0-3）转换为 8 位灰度"""
+    return bytes(GRAY[p] for p in pixels)
+
+
+def save_pgm(path, buf, width=WIDTH, height=HEIGHT):
+    """将显示缓冲区导出为 PGM（P5）图像
+
+    使用示例：
+    save_pgm('screen.pgm', lcd.buffer)
+    """
+    gray = to_gray(decode(buf, width, height))
+    with open(path, 'wb') as f:
+        f.write('P5\n{} {}\n255\n'.format(width, height).encode())
+        f.write(gray)
+
+
+def _compress(data):
+    """zlib 压缩；没有 zlib.compress 时使用不压缩的存储块"""
+    if zlib is not None and hasattr(zlib, 'compress'):
+        return zlib.compress(data)
+
+    out = bytearray(b'\x78\x01')
+    pos = 0
+    while True:
+        block = data[pos:pos + 0xFFFF]
+        pos += len(block)
+        final = 1 if pos >= len(data) else 0
+        out += struct.pack('<BHH', final, len(block), len(block) ^ 0xFFFF)
+        out += block
+        if final:
+            break
+
+    # Adler-32 校验
+    a, b = 1, 0
+    for byte in data:
+        a = (a + byte) % 65521
+        b = (b + a) % 65521
+    out += struct.pack('>I', (b << 16) | a)
+    return bytes(out)
+
+
+def _decompress(data):
+    """zlib 解压，兼容 MicroPython 的 deflate 模块"""
+    if zlib is not None and hasattr(zlib, 'decompress'):
+        return zlib.decompress(data)
+    import io
+    import deflate
+    return deflate.DeflateIO(io.BytesIO(data), deflate.ZLIB).read()
+
+
+def _crc32(data):
+    if zlib is not None and hasattr(zlib, 'crc32'):
+        return zlib.crc32(data) & 0xFFFFFFFF
+    crc = 0xFFFFFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xEDB88320 if crc & 1 else 0)
+    return crc ^ 0xFFFFFFFF
+
+
+def _chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data +
+            struct.pack('>I', _crc32(kind + data)))
+
+
+def save_png(path, buf, width=WIDTH, height=HEIGHT):
+    """将显示缓冲区导出为 8 位灰度 PNG 图像
+
+    使用示例：
+    save_png('screen.png', lcd.buffer)
+    """
+    gray = to_gray(decode(buf, width, height))
+    raw = bytearray()
+    for y in range(height):
+        raw.append(0)  # 每行的过滤类型：None
+        raw += gray[y * width:(y + 1) * width]
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)))
+        f.write(_chunk(b'IDAT', _compress(bytes(raw))))
+        f.write(_chunk(b'IEND', b''))
+
+
+def load_png(path):
+    """读取 save_png() 写出的 PNG 图像
+
+    只支持 8 位灰度、不带过滤的图像。返回 (width, height, pixels)，
+    pixels 为逐像素的值（0-3）
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError('not a PNG file: {}'.format(path))
+
+    pos = 8
+    idat = bytearray()
+    width = height = 0
+    while pos < len(data):
+        length = struct.unpack('>I', data[pos:pos + 4])[0]
+        kind = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b'IHDR':
+            width, height, depth, color_type = struct.unpack('>IIBB', body[:10])
+            if depth != 8 or color_type != 0:
+                raise ValueError('unsupported PNG format: {}'.format(path))
+        elif kind == b'IDAT':
+            idat += body
+        elif kind == b'IEND':
+            break
+
+    raw = _decompress(bytes(idat))
+    levels = {gray: value for value, gray in enumerate(GRAY)}
+    pixels = bytearray(width * height)
+    stride = width + 1
+    for y in range(height):
+        if raw[y * stride] != 0:
+            raise ValueError('unsupported PNG filter: {}'.format(path))
+        row = raw[y * stride + 1:(y + 1) * stride]
+        base = y * width
+        for x in range(width):
+            pixels[base + x] = levels[row[x]]
+    return width, height, pixels
+
+
+class HostPin:
+    """主机上模拟的引脚，记录当前电平
+
+    与 machine.Pin 的 init() 和 __call__() 接口兼容
+    """
+    OUT = 1
+
+    def __init__(self, value=0):
+        self._value = value
+
+    def init(self, mode=None, value=None):
+        if value is not None:
+            self._value = value
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = value
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+
+class CaptureSPI:
+    """抓取 SPI 通信并模拟控制器显存
+
+    解析列/行地址设置（0x2A/0x2B）和写显存（0x2C）命令，把写入的数据
+    按地址窗口放入 frame，frame 与 lcd.buffer 布局相同，可直接用 decode()
+    或 save_png() 导出
+
+    参数说明：
+    dc: 数据/命令选择引脚（HostPin），用于区分命令和数据
+
+    使用示例：
+    dc = HostPin()
+    spi = CaptureSPI(dc)
+    lcd = ST7306(spi, HostPin(), dc, HostPin())
+    lcd.show()
+    save_png('frame.png', spi.frame)
+    """
+    # 全屏地址窗口
+    COL_START = 0x05
+    COL_END = 0x36
+    ROW_START = 0x00
+    ROW_END = 0xC7
+
+    def __init__(self, dc):
+        self.dc = dc
+        self.frame = bytearray(DATA_WIDTH * (HEIGHT // 2))
+        self.bytes_written = 0
+        self._command = None
+        self._params = bytearray()
+        self._cols = (self.COL_START, self.COL_END)
+        self._rows = (self.ROW_START, self.ROW_END)
+        self._pos = 0
+
+    def write(self, data):
+        if not self.dc():
+            for cmd in data:
+                self._command = cmd
+                self._params = bytearray()
+                if cmd == 0x2C:
+                    self._pos = 0
+            return
+
+        if self._command == 0x2C:
+            self._write_ram(data)
+        elif self._command in (0x2A, 0x2B):
+            self._params += data
+            if len(self._params) >= 2:
+                window = (self._params[0], self._params[1])
+                if self._command == 0x2A:
+                    self._cols = window
+                else:
+                    self._rows = window
+
+    def _write_ram(self, data):
+        # 每个列地址对应3个字节，每个行地址对应缓冲区的一行
+        col0 = (self._cols[0] - self.COL_START) * 3
+        row_bytes = (self._cols[1] - self._cols[0] + 1) * 3
+        rows = self._rows[1] - self._rows[0] + 1
+        data = memoryview(data)
+        done = 0
+        while done < len(data):
+            row = self._pos // row_bytes
+            if row >= rows:
+                break
+            offset = self._pos % row_bytes
+            count = min(row_bytes - offset, len(data) - done)
+            index = (self._rows[0] + row) * DATA_WIDTH + col0 + offset
+            self.frame[index:index + count] = data[done:done + count]
+            done += count
+            self._pos += count
+        self.bytes_written += len(data)
+
+
+def install_host_modules():
+    """在主机上运行驱动时补齐 machine / framebuf / time 中缺少的部分
+
+    CPython 没有 machine 和 framebuf；MicroPython unix 版有 machine 模块，
+    但其中没有 Pin 和 SPI。缺少时用 HostPin / CaptureSPI 代替，
+    模块中已有的其它内容保持不变。必须在导入 st7306 之前调用
+    """
+    try:
+        import machine
+    except ImportError:
+        machine = None
+
+    if machine is None or not hasattr(machine, 'Pin') or not hasattr(machine, 'SPI'):
+        # 内置模块不能添加属性，用一个类代替并复制原有内容
+        class host_machine:
+            pass
+        if machine is not None:
+            for name in dir(machine):
+                if not name.startswith('__'):
+                    value = getattr(machine, name)
+                    if callable(value) and not isinstance(value, type):
+                        value = staticmethod(value)
+                    setattr(host_machine, name, value)
+        if not hasattr(host_machine, 'Pin'):
+            host_machine.Pin = HostPin
+        if not hasattr(host_machine, 'SPI'):
+            host_machine.SPI = CaptureSPI
+        sys.modules['machine'] = host_machine
+
+    try:
+        import framebuf
+    except ImportError:
+        class FrameBuffer:
+            def __init__(self, buffer, width, height, format):
+                pass
+
+        class framebuf:
+            GS2_HMSB = 0
+        framebuf.FrameBuffer = FrameBuffer
+        sys.modules['framebuf'] = framebuf
+
+    if not hasattr(time, 'sleep_ms'):
+        time.sleep_ms = lambda ms: None
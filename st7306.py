@@ -2,8 +2,142 @@ from machine import Pin, SPI
 import framebuf
 import time
 import math
+from array import array
 from font import FONT_8x8
 
+# 字模预先转换为 bytes，便于绘图内核直接按指针读取
+_GLYPHS = {char: bytes(rows) for char, rows in FONT_8x8.items()}
+
+
+# ---------------------------------------------------------------------------
+# 纯 Python 绘图内核（回退实现）
+#
+# 与 st7306_viper.py 中的 viper 内核接口、输出完全一致。固件支持 viper 时
+# 会在导入时自动替换为 viper 版本，否则（包括 CPython 主机测试）使用这里的实现。
+#
+# args 数组的后4项为裁剪区域 [clip_x0, clip_y0, clip_x1, clip_y1]，
+# 内核只写入裁剪区域内的像素。
+# ---------------------------------------------------------------------------
+
+_LCD_DATA_WIDTH = 150  # 与 ST7306.LCD_DATA_WIDTH 一致
+
+
+def _pixel_py(buf, x, y, color):
+    """写入单个像素（调用方负责边界检查）"""
+    # 计算字节索引和位位置
+    real_x = x // 2
+    real_y = y // 2
+    write_byte_index = real_y * _LCD_DATA_WIDTH + real_x
+
+    # 计算位位置
+    one_two = 1 if y % 2 else 0
+    line_bit_1 = (x % 2) * 4
+    line_bit_0 = (x % 2) * 4 + 2
+    write_bit_1 = 7 - (line_bit_1 + one_two)
+    write_bit_0 = 7 - (line_bit_0 + one_two)
+
+    # 设置颜色值
+    data_bit0 = (color & 0x01) > 0
+    data_bit1 = (color & 0x02) > 0
+
+    if data_bit1:
+        buf[write_byte_index] |= (1 << write_bit_1)
+    else:
+        buf[write_byte_index] &= ~(1 << write_bit_1)
+
+    if data_bit0:
+        buf[write_byte_index] |= (1 << write_bit_0)
+    else:
+        buf[write_byte_index] &= ~(1 << write_bit_0)
+
+
+def _fill_py(buf, size, value):
+    """用同一个字节填充缓冲区前 size 个字节"""
+    for i in range(size):
+        buf[i] = value
+
+
+def _line_py(buf, args, value):
+    """Bresenham 画线
+
+    args: array('h', [x1, y1, x2, y2, 裁剪区域])，坐标已由调用方限制在屏幕范围内
+    value: 像素值（0 或 3）
+    """
+    x1, y1, x2, y2, clip_x0, clip_y0, clip_x1, clip_y1 = args
+
+    dx = abs(x2 - x1)
+    dy = abs(y2 - y1)
+    steep = dy > dx
+
+    if steep:
+        x1, y1 = y1, x1
+        x2, y2 = y2, x2
+        dx, dy = dy, dx
+
+    if x1 > x2:
+        x1, x2 = x2, x1
+        y1, y2 = y2, y1
+
+    dx = x2 - x1
+    dy = abs(y2 - y1)
+    error = dx // 2
+    y = y1
+    y_step = 1 if y1 < y2 else -1
+
+    for x in range(x1, x2 + 1):
+        if steep:
+            if clip_x0 <= y < clip_x1 and clip_y0 <= x < clip_y1:
+                _pixel_py(buf, y, x, value)
+        else:
+            if clip_x0 <= x < clip_x1 and clip_y0 <= y < clip_y1:
+                _pixel_py(buf, x, y, value)
+
+        error -= dy
+        if error < 0:
+            y += y_step
+            error += dx
+
+
+def _glyph_py(buf, font_data, args):
+    """绘制单个 8x8 字符
+
+    font_data: 8 字节的字模（bytes）
+    args: array('h', [x, y, scale, value, 裁剪区域])
+    """
+    x, y, scale, value, clip_x0, clip_y0, clip_x1, clip_y1 = args
+    for row in range(8):
+        row_data = font_data[row]
+        for col in range(8):
+            if row_data & (1 << col):
+                for dy in range(scale):
+                    for dx in range(scale):
+                        px = x + col * scale + dx
+                        py = y + row * scale + dy
+                        if clip_x0 <= px < clip_x1 and clip_y0 <= py < clip_y1:
+                            _pixel_py(buf, px, py, value)
+
+
+# 导入时自动选择内核：优先使用 viper 版本，不可用时回退到纯 Python
+try:
+    import st7306_viper as _viper
+except Exception:
+    # ImportError（CPython / 无 micropython 模块）或固件不支持 viper 时的编译错误
+    _viper = None
+
+if _viper is not None:
+    KERNEL = 'viper'
+    _pixel = _viper.pixel
+    _fill = _viper.fill
+    _line = _viper.line
+    _glyph = _viper.glyph
+else:
+    KERNEL = 'python'
+    _pixel = _pixel_py
+    _fill = _fill_py
+    _line = _line_py
+    _glyph = _glyph_py
+
+
 class ST7306(framebuf.FrameBuffer):
     """ST7306 电子墨水屏驱动类
     继承自 framebuf.FrameBuffer，提供基本的显示功能
@@ -56,6 +190,10 @@ class ST7306(framebuf.FrameBuffer):
         # 创建显示缓冲区
         self.buffer = bytearray(self.BUFFER_SIZE)
 
+        # 传给绘图内核的坐标参数，复用以避免每次绘制都分配内存
+        # 前4项为绘图参数，后4项为裁剪区域 [x0, y0, x1, y1]
+        self._kernel_args = array('h', (0, 0, 0, 0, 0, 0, self.LCD_WIDTH, self.LCD_HEIGHT))
+
         # 初始化FrameBuffer
         super().__init__(self.buffer, self.LCD_WIDTH, self.LCD_HEIGHT, framebuf.GS2_HMSB)
 
@@ -78,33 +216,41 @@ class ST7306(framebuf.FrameBuffer):
             return
 
         if color is None:
-            return super().pixel(x, y)
-
-        # 计算字节索引和位位置
-        real_x = x // 2
-        real_y = y // 2
-        write_byte_index = real_y * self.LCD_DATA_WIDTH + real_x
-
-        # 计算位位置
-        one_two = 1 if y % 2 else 0
-        line_bit_1 = (x % 2) * 4
-        line_bit_0 = (x % 2) * 4 + 2
-        write_bit_1 = 7 - (line_bit_1 + one_two)
-        write_bit_0 = 7 - (line_bit_0 + one_two)
-
-        # 设置颜色值
-        data_bit0 = (color & 0x01) > 0
-        data_bit1 = (color & 0x02) > 0
-
-        if data_bit1:
-            self.buffer[write_byte_index] |= (1 << write_bit_1)
-        else:
-            self.buffer[write_byte_index] &= ~(1 << write_bit_1)
+            # 按与写入相同的 2x2 交错布局读取
+            data = self.buffer[(y // 2) * self.LCD_DATA_WIDTH + x // 2]
+            bit1 = 7 - ((x % 2) * 4 + y % 2)
+            return (((data >> bit1) & 0x01) << 1) | ((data >> (bit1 - 2)) & 0x01)
+
+        # 裁剪区域之外的像素不写入
+        args = self._kernel_args
+        if not (args[4] <= x < args[6] and args[5] <= y < args[7]):
+            return
 
-        if data_bit0:
-            self.buffer[write_byte_index] |= (1 << write_bit_0)
-        else:
-            self.buffer[write_byte_index] &= ~(1 << write_bit_0)
+        _pixel(self.buffer, x, y, color)
+
+    def set_clip(self, x=0, y=0, width=None, height=None):
+        """设置裁剪区域
+
+        之后的 pixel / draw_* / fill_rect 只会修改裁剪区域内的像素，
+        fill() 不受影响。不带参数调用时恢复为整屏
+
+        参数说明：
+        x, y: 区域左上角坐标
+        width: 区域宽度，None 表示到屏幕右边缘
+        height: 区域高度，None 表示到屏幕下边缘
+
+        使用示例：
+        lcd.set_clip(0, 0, 150, 400)  # 只允许绘制左半屏
+        lcd.draw_line(0, 0, 299, 399, 1)
+        lcd.set_clip()  # 恢复整屏
+        """
+        x1 = self.LCD_WIDTH if width is None else x + width
+        y1 = self.LCD_HEIGHT if height is None else y + height
+        args = self._kernel_args
+        args[4] = max(0, x)
+        args[5] = max(0, y)
+        args[6] = max(args[4], min(self.LCD_WIDTH, x1))
+        args[7] = max(args[5], min(self.LCD_HEIGHT, y1))
 
     def show(self):
         """更新显示内容到屏幕
@@ -134,6 +280,57 @@ class ST7306(framebuf.FrameBuffer):
         self.spi.write(self.buffer)
         self.cs(1)
 
+    def show_rect(self, x, y, width, height):
+        """只刷新指定区域到屏幕
+
+        控制器列地址以3字节（6个像素）为单位，行地址以2个像素为单位，
+        区域会向外对齐到这个粒度后发送，比 show() 发送的数据量更少
+
+        参数说明：
+        x, y: 区域左上角坐标
+        width: 区域宽度
+        height: 区域高度
+
+        使用示例：
+        lcd.draw_string(10, 10, "42", 2, 1)
+        lcd.show_rect(10, 10, 32, 16)  # 只刷新文字所在区域
+        """
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.LCD_WIDTH, x + width)
+        y1 = min(self.LCD_HEIGHT, y + height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        col0 = x0 // 6
+        col1 = (x1 - 1) // 6
+        row0 = y0 // 2
+        row1 = (y1 - 1) // 2
+
+        # 设置列地址范围（全屏为 0x05-0x36）
+        self.write_command(0x2A)
+        self.write_data(0x05 + col0)
+        self.write_data(0x05 + col1)
+
+        # 设置行地址范围（全屏为 0x00-0xC7）
+        self.write_command(0x2B)
+        self.write_data(row0)
+        self.write_data(row1)
+
+        # 准备写入数据
+        self.write_command(0x2C)
+
+        # 逐行发送区域内的显示数据
+        start = col0 * 3
+        end = (col1 + 1) * 3
+        mv = memoryview(self.buffer)
+        self.dc(1)
+        self.cs(0)
+        for row in range(row0, row1 + 1):
+            base = row * self.LCD_DATA_WIDTH
+            self.spi.write(mv[base + start:base + end])
+        self.cs(1)
+
     def fill(self, color):
         """填充整个屏幕为指定颜色
 
@@ -150,8 +347,7 @@ class ST7306(framebuf.FrameBuffer):
         """
         color = color & 0x03
         fill_value = (color << 6) | (color << 4) | (color << 2) | color
-        for i in range(self.BUFFER_SIZE):
-            self.buffer[i] = fill_value
+        _fill(self.buffer, self.BUFFER_SIZE, fill_value)
         self.show()
 
     def clear(self):
@@ -183,37 +379,12 @@ class ST7306(framebuf.FrameBuffer):
         x2 = max(0, min(x2, self.LCD_WIDTH - 1))
         y2 = max(0, min(y2, self.LCD_HEIGHT - 1))
 
-        dx = abs(x2 - x1)
-        dy = abs(y2 - y1)
-        steep = dy > dx
-
-        if steep:
-            x1, y1 = y1, x1
-            x2, y2 = y2, x2
-            dx, dy = dy, dx
-
-        if x1 > x2:
-            x1, x2 = x2, x1
-            y1, y2 = y2, y1
-
-        dx = x2 - x1
-        dy = abs(y2 - y1)
-        error = dx // 2
-        y = y1
-        y_step = 1 if y1 < y2 else -1
-
-        for x in range(x1, x2 + 1):
-            if steep:
-                if 0 <= y < self.LCD_WIDTH and 0 <= x < self.LCD_HEIGHT:
-                    self.pixel(y, x, value)
-            else:
-                if 0 <= x < self.LCD_WIDTH and 0 <= y < self.LCD_HEIGHT:
-                    self.pixel(x, y, value)
-
-            error -= dy
-            if error < 0:
-                y += y_step
-                error += dx
+        args = self._kernel_args
+        args[0] = x1
+        args[1] = y1
+        args[2] = x2
+        args[3] = y2
+        _line(self.buffer, args, value)
 
     def draw_rect(self, x, y, width, height, color=1):
         """绘制矩形
@@ -235,17 +406,75 @@ class ST7306(framebuf.FrameBuffer):
         width = min(width, self.LCD_WIDTH - x)
         height = min(height, self.LCD_HEIGHT - y)
 
+        # 四条边只在裁剪区域内遍历，完全落在裁剪区域外的边直接跳过
+        # （裁剪区域总在屏幕范围内，不需要再做屏幕边界检查）
+        args = self._kernel_args
+        clip_x0, clip_y0, clip_x1, clip_y1 = args[4], args[5], args[6], args[7]
+        buf = self.buffer
+        right = x + width - 1
+        bottom = y + height - 1
+
         # 绘制水平边
-        for i in range(x, x + width):
-            self.pixel(i, y, value)  # 上边
-            if y + height - 1 < self.LCD_HEIGHT:
-                self.pixel(i, y + height - 1, value)  # 下边
+        x0 = max(x, clip_x0)
+        x1 = min(x + width, clip_x1)
+        for row in (y, bottom):  # 上边、下边
+            if clip_y0 <= row < clip_y1:
+                for i in range(x0, x1):
+                    _pixel(buf, i, row, value)
 
         # 绘制垂直边
-        for i in range(y, y + height):
-            self.pixel(x, i, value)  # 左边
-            if x + width - 1 < self.LCD_WIDTH:
-                self.pixel(x + width - 1, i, value)  # 右边
+        y0 = max(y, clip_y0)
+        y1 = min(y + height, clip_y1)
+        for col in (x, right):  # 左边、右边
+            if clip_x0 <= col < clip_x1:
+                for i in range(y0, y1):
+                    _pixel(buf, col, i, value)
+
+    def fill_rect(self, x, y, width, height, color):
+        """填充矩形区域（受裁剪区域限制）
+
+        参数说明：
+        x, y: 左上角坐标
+        width: 矩形宽度
+        height: 矩形高度
+        color: 填充颜色（0-3）
+
+        使用示例：
+        lcd.fill_rect(10, 10, 100, 50, 0)  # 将区域清为白色
+        """
+        args = self._kernel_args
+        x0 = max(args[4], x)
+        y0 = max(args[5], y)
+        x1 = min(args[6], x + width)
+        y1 = min(args[7], y + height)
+        color = color & 0x03
+        # 与 pixel() 的位布局一致：bit1 位于 BIT7/6/3/2，bit0 位于 BIT5/4/1/0
+        fill_value = (0xCC if color & 0x02 else 0) | (0x33 if color & 0x01 else 0)
+
+        # 完整覆盖的字节（2x2像素）直接按字节填充，边缘的单个像素逐点写入
+        ix0 = (x0 + 1) & ~1
+        ix1 = x1 & ~1
+        iy0 = (y0 + 1) & ~1
+        iy1 = y1 & ~1
+        buf = self.buffer
+        if ix0 < ix1 and iy0 < iy1:
+            mv = memoryview(buf)
+            count = (ix1 - ix0) // 2
+            for row in range(iy0 // 2, iy1 // 2):
+                _fill(mv[row * self.LCD_DATA_WIDTH + ix0 // 2:], count, fill_value)
+        else:
+            ix0 = ix1 = x0
+            iy0 = iy1 = y0
+
+        for py in range(y0, y1):
+            if iy0 <= py < iy1:
+                for px in range(x0, ix0):
+                    _pixel(buf, px, py, color)
+                for px in range(ix1, x1):
+                    _pixel(buf, px, py, color)
+            else:
+                for px in range(x0, x1):
+                    _pixel(buf, px, py, color)
 
     def draw_circle(self, x0, y0, radius, color=1):
         """绘制圆形
@@ -301,6 +530,10 @@ class ST7306(framebuf.FrameBuffer):
         char_width = 8 * scale
         char_height = 8 * scale
 
+        args = self._kernel_args
+        args[2] = scale
+        args[3] = value
+
         for char in text:
             if char not in FONT_8x8:
                 continue
@@ -311,17 +544,9 @@ class ST7306(framebuf.FrameBuffer):
                 if y + char_height > self.LCD_HEIGHT:
                     break
 
-            font_data = FONT_8x8[char]
-            for row in range(8):
-                row_data = font_data[row]
-                for col in range(8):
-                    if row_data & (1 << col):
-                        for dy in range(scale):
-                            for dx in range(scale):
-                                px = x + col * scale + dx
-                                py = y + row * scale + dy
-                                if px < self.LCD_WIDTH and py < self.LCD_HEIGHT:
-                                    self.pixel(px, py, value)
+            args[0] = x
+            args[1] = y
+            _glyph(self.buffer, _GLYPHS[char], args)
             x += char_width
 
     def write_command(self, cmd):
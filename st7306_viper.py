@@ -0,0 +1,146 @@
+import micropython
+from micropython import const
+
+# ST7306 热点绘图内核（viper 版本）
+#
+# 由 st7306.py 在导入时自动加载，直接通过 ptr8 操作显示缓冲区。
+# 不支持 viper 的固件（或 CPython）导入本模块会失败，此时 st7306.py
+# 会回退到纯 Python 实现，两者输出的缓冲区内容完全一致。
+#
+# args 数组的后4项为裁剪区域 [clip_x0, clip_y0, clip_x1, clip_y1]，
+# 内核只写入裁剪区域内的像素。
+#
+# 缓冲区布局与 ST7306 保持一致：
+# P0P2 P4P6      BIT7 BIT5 BIT3 BIT1
+# P1P3 P5P7  ->  BIT6 BIT4 BIT2 BIT0
+
+_LCD_DATA_WIDTH = const(150)  # 与 ST7306.LCD_DATA_WIDTH 一致
+
+
+@micropython.viper
+def pixel(buf, x: int, y: int, color: int):
+    """写入单个像素（调用方负责边界检查）"""
+    b = ptr8(buf)
+    i = (y >> 1) * _LCD_DATA_WIDTH + (x >> 1)
+    bit1 = 7 - (((x & 1) << 2) + (y & 1))
+    bit0 = bit1 - 2
+    mask = (1 << bit1) | (1 << bit0)
+    bits = (((color >> 1) & 1) << bit1) | ((color & 1) << bit0)
+    b[i] = (b[i] & (mask ^ 0xFF)) | bits
+
+
+@micropython.viper
+def fill(buf, size: int, value: int):
+    """用同一个字节填充缓冲区前 size 个字节"""
+    b = ptr8(buf)
+    for i in range(size):
+        b[i] = value
+
+
+@micropython.viper
+def line(buf, args, value: int):
+    """Bresenham 画线
+
+    args: array('h', [x1, y1, x2, y2, 裁剪区域])，坐标已由调用方限制在屏幕范围内
+    value: 像素值（0 或 3）
+    """
+    a = ptr16(args)
+    b = ptr8(buf)
+    x1 = int(a[0])
+    y1 = int(a[1])
+    x2 = int(a[2])
+    y2 = int(a[3])
+    clip_x0 = int(a[4])
+    clip_y0 = int(a[5])
+    clip_x1 = int(a[6])
+    clip_y1 = int(a[7])
+
+    dx = x2 - x1 if x2 > x1 else x1 - x2
+    dy = y2 - y1 if y2 > y1 else y1 - y2
+    steep = dy > dx
+
+    if steep:
+        t = x1
+        x1 = y1
+        y1 = t
+        t = x2
+        x2 = y2
+        y2 = t
+
+    if x1 > x2:
+        t = x1
+        x1 = x2
+        x2 = t
+        t = y1
+        y1 = y2
+        y2 = t
+
+    dx = x2 - x1
+    dy = y2 - y1 if y2 > y1 else y1 - y2
+    error = dx >> 1
+    y = y1
+    y_step = 1 if y1 < y2 else -1
+
+    for x in range(x1, x2 + 1):
+        if steep:
+            px = y
+            py = x
+        else:
+            px = x
+            py = y
+        if px >= clip_x0 and px < clip_x1 and py >= clip_y0 and py < clip_y1:
+            i = (py >> 1) * _LCD_DATA_WIDTH + (px >> 1)
+            bit1 = 7 - (((px & 1) << 2) + (py & 1))
+            bit0 = bit1 - 2
+            mask = (1 << bit1) | (1 << bit0)
+            bits = (((value >> 1) & 1) << bit1) | ((value & 1) << bit0)
+            b[i] = (b[i] & (mask ^ 0xFF)) | bits
+
+        error -= dy
+        if error < 0:
+            y += y_step
+            error += dx
+
+
+@micropython.viper
+def glyph(buf, font_data, args):
+    """绘制单个 8x8 字符
+
+    font_data: 8 字节的字模（bytes）
+    args: array('h', [x, y, scale, value, 裁剪区域])
+    """
+    a = ptr16(args)
+    f = ptr8(font_data)
+    b = ptr8(buf)
+    x = int(a[0])
+    y = int(a[1])
+    scale = int(a[2])
+    value = int(a[3])
+    clip_x0 = int(a[4])
+    clip_y0 = int(a[5])
+    clip_x1 = int(a[6])
+    clip_y1 = int(a[7])
+    # ptr16 按无符号读取，还原负的起始坐标
+    if x >= 0x8000:
+        x -= 0x10000
+    if y >= 0x8000:
+        y -= 0x10000
+
+    for row in range(8):
+        row_data = int(f[row])
+        for col in range(8):
+            if row_data & (1 << col):
+                for dy in range(scale):
+                    py = y + row * scale + dy
+                    if py < clip_y0 or py >= clip_y1:
+                        continue
+                    for dx in range(scale):
+                        px = x + col * scale + dx
+                        if px < clip_x0 or px >= clip_x1:
+                            continue
+                        i = (py >> 1) * _LCD_DATA_WIDTH + (px >> 1)
+                        bit1 = 7 - (((px & 1) << 2) + (py & 1))
+                        bit0 = bit1 - 2
+                        mask = (1 << bit1) | (1 << bit0)
+                        bits = (((value >> 1) & 1) << bit1) | ((value & 1) << bit0)
+                        b[i] = (b[i] & (mask ^ 0xFF)) | bits
@@ -0,0 +1,276 @@
+from font import FONT_8x8
+
+# 文字排版
+#
+# 基于 FONT_8x8 的文字测量、按单词换行和左/中/右对齐。换行结果会被缓存，
+# TextField 在内容变化时只重绘与上次内容不同的字符格子。
+#
+# 与 ST7306.draw_string 一致，字库中没有的字符会被忽略（不占位置）。
+
+LEFT = 0
+CENTER = 1
+RIGHT = 2
+
+_CACHE_SIZE = 32
+_cache = {}
+
+
+def _clean(text):
+    """去掉字库中没有的字符（保留换行符）"""
+    return ''.join(c for c in text if c in FONT_8x8 or c == '\n')
+
+
+def _tokens(paragraph):
+    """把一段文字拆成单词和连续空格交替的片段"""
+    tokens = []
+    start = 0
+    for i in range(1, len(paragraph) + 1):
+        if i == len(paragraph) or (paragraph[i] == ' ') != (paragraph[start] == ' '):
+            tokens.append(paragraph[start:i])
+            start = i
+    return tokens
+
+
+def measure(text, scale=1):
+    """测量文字尺寸（不自动换行，只按换行符分行）
+
+    参数说明：
+    text: 要测量的文本
+    scale: 字体缩放倍数，默认为1
+
+    返回 (width, height)
+
+    使用示例：
+    w, h = measure("12.5V", 2)  # (80, 16)
+    """
+    lines = _clean(text).split('\n')
+    size = 8 * scale
+    return max(len(line) for line in lines) * size, len(lines) * size
+
+
+def wrap(text, width, scale=1):
+    """按单词将文字换行到指定宽度内
+
+    行首和单词之间的连续空格会被保留（用于补齐宽度的数值），只有换行处的
+    空格被丢弃。超过一行宽度的单词会被截断到下一行。结果会被缓存，
+    同样的参数再次调用时直接返回缓存
+
+    参数说明：
+    text: 要换行的文本，可包含换行符
+    width: 区域宽度（像素）
+    scale: 字体缩放倍数，默认为1
+
+    返回由各行字符串组成的元组
+
+    使用示例：
+    lines = wrap("Battery voltage low", 100)  # ('Battery', 'voltage low')
+    """
+    key = (text, width, scale)
+    lines = _cache.get(key)
+    if lines is not None:
+        return lines
+
+    columns = max(1, width // (8 * scale))
+    result = []
+    for paragraph in _clean(text).split('\n'):
+        line = ''
+        dropped = False
+        first = len(result)
+        for token in _tokens(paragraph):
+            if len(line) + len(token) <= columns:
+                line += token
+                dropped = False
+                continue
+            if token[0] == ' ':
+                # 换行落在空格处，丢弃这段空格
+                if line:
+                    result.append(line)
+                line = ''
+                dropped = True
+                continue
+            dropped = False
+            # 单词放不下：在它前面的空格处换行
+            line = line.rstrip(' ')
+            if line:
+                result.append(line)
+            # 超长单词按列数截断
+            while len(token) > columns:
+                result.append(token[:columns])
+                token = token[columns:]
+            line = token
+        # 段尾的空格被换行丢弃时不再产生空行（整段只有空格时仍保留一行）
+        if line or not dropped or len(result) == first:
+            result.append(line)
+
+    lines = tuple(result)
+    if len(_cache) >= _CACHE_SIZE:
+        _cache.clear()
+    _cache[key] = lines
+    return lines
+
+
+def layout(text, width, height=None, scale=1, align=LEFT):
+    """排版文字，返回每个字符格子的位置
+
+    参数说明：
+    text: 要排版的文本
+    width: 区域宽度（像素）
+    height: 区域高度（像素），None 表示不限制，超出的行会被丢弃
+    scale: 字体缩放倍数，默认为1
+    align: 对齐方式 LEFT / CENTER / RIGHT
+
+    返回字典 {(x, y): 字符}，坐标相对于区域左上角，不包含空格
+
+    使用示例：
+    cells = layout("42", 64, scale=2, align=RIGHT)  # {(32, 0): '4', (48, 0): '2'}
+    """
+    size = 8 * scale
+    lines = wrap(text, width, scale)
+    if height is not None:
+        lines = lines[:height // size]
+
+    cells = {}
+    for row, line in enumerate(lines):
+        line_width = len(line) * size
+        if align == CENTER:
+            x = (width - line_width) // 2
+        elif align == RIGHT:
+            x = width - line_width
+        else:
+            x = 0
+        y = row * size
+        for char in line:
+            if char != ' ':
+                cells[(x, y)] = char
+            x += size
+    return cells
+
+
+def draw_text(lcd, x, y, text, width, height=None, scale=1, align=LEFT, color=1):
+    """在指定区域内换行、对齐并绘制文字
+
+    参数说明：
+    lcd: ST7306 对象
+    x, y: 区域左上角坐标
+    text: 要显示的文本
+    width: 区域宽度（像素）
+    height: 区域高度（像素），None 表示不限制
+    scale: 字体缩放倍数，默认为1
+    align: 对齐方式 LEFT / CENTER / RIGHT
+    color: 文字颜色（0-3），默认为1
+
+    使用示例：
+    draw_text(lcd, 10, 10, "Hello World", 100, align=CENTER)
+    """
+    size = 8 * scale
+    for (cx, cy), char in layout(text, width, height, scale, align).items():
+        # draw_string 遇到右边缘会折行到 x=0，超出屏幕的格子不绘制
+        if x + cx + size <= lcd.LCD_WIDTH:
+            lcd.draw_string(x + cx, y + cy, char, scale, color)
+
+
+class TextField:
+    """可更新的文字区域
+
+    每次设置新内容时只重绘与上次内容不同的字符格子，
+    适合每次只变化一两个字符的数值显示
+
+    参数说明：
+    lcd: ST7306 对象
+    x, y: 区域左上角坐标
+    width: 区域宽度（像素）
+    height: 区域高度（像素），None 表示不限制
+    scale: 字体缩放倍数，默认为1
+    align: 对齐方式 LEFT / CENTER / RIGHT
+    color: 文字颜色（0-3），默认为1
+    background: 背景颜色（0-3），默认为0
+
+    使用示例：
+    field = TextField(lcd, 10, 10, 120, scale=2, align=RIGHT)
+    field.set_text("12.5V")
+    field.set_text("12.6V")  # 只重绘变化的 "6"
+    """
+    def __init__(self, lcd, x, y, width, height=None, scale=1, align=LEFT, color=1, background=0):
+        self.lcd = lcd
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.align = align
+        self.color = color
+        self.background = background
+        self.text = None
+        self._cells = {}
+
+    def set_text(self, text, show=True):
+        """更新文字内容
+
+        参数说明：
+        text: 新的文本
+        show: 是否立即刷新变化的区域到屏幕，默认为True
+
+        返回变化区域 (x, y, w, h)，内容没有变化时返回 None
+        """
+        if text == self.text:
+            return None
+        self.text = text
+
+        old = self._cells
+        new = layout(text, self.width, self.height, self.scale, self.align)
+        self._cells = new
+
+        size = 8 * self.scale
+        # 需要清除的旧格子：位置上已没有字符或字符不同
+        cleared = [pos for pos, char in old.items() if new.get(pos) != char]
+        # 需要绘制的新格子：内容变化，或与被清除的格子重叠
+        dirty = [pos for pos, char in new.items() if old.get(pos) != char]
+        for pos in new:
+            if pos not in dirty:
+                for cx, cy in cleared:
+                    if abs(pos[0] - cx) < size and abs(pos[1] - cy) < size:
+                        dirty.append(pos)
+                        break
+
+        if not cleared and not dirty:
+            return None
+
+        for cx, cy in cleared:
+            self.lcd.fill_rect(self.x + cx, self.y + cy, size, size, self.background)
+        for pos in dirty:
+            self._draw_cell(pos, new[pos], pos not in cleared)
+        return self._flush(cleared + dirty, show)
+
+    def redraw(self, show=True):
+        """重新绘制当前内容的所有字符（例如屏幕被清除之后）
+
+        返回重绘区域 (x, y, w, h)，没有内容时返回 None
+        """
+        for pos, char in self._cells.items():
+            self._draw_cell(pos, char, True)
+        return self._flush(list(self._cells), show)
+
+    def _draw_cell(self, pos, char, clear):
+        """绘制一个字符格子，clear 为 True 时先清为背景色"""
+        size = 8 * self.scale
+        px = self.x + pos[0]
+        py = self.y + pos[1]
+        if clear:
+            self.lcd.fill_rect(px, py, size, size, self.background)
+        # draw_string 遇到右边缘会折行到 x=0，超出屏幕的格子不绘制
+        if px + size <= self.lcd.LCD_WIDTH:
+            self.lcd.draw_string(px, py, char, self.scale, self.color)
+
+    def _flush(self, positions, show):
+        """计算格子的外接矩形并按需刷新到屏幕"""
+        if not positions:
+            return None
+        size = 8 * self.scale
+        x0 = min(p[0] for p in positions)
+        y0 = min(p[1] for p in positions)
+        x1 = max(p[0] for p in positions) + size
+        y1 = max(p[1] for p in positions) + size
+        rect = (self.x + x0, self.y + y0, x1 - x0, y1 - y0)
+        if show:
+            self.lcd.show_rect(rect[0], rect[1], rect[2], rect[3])
+        return rect